@@ -0,0 +1,63 @@
+# batchcorr
+# In-memory dark correction, bad pixel correction and summing of frames produced
+# using the a-Si (GE) detectors at 1-ID at APS.
+# The batchcorrNP*.py scripts are thin command-line wrappers around this package;
+# acquisition or analysis code can call the same functions directly on NumPy
+# arrays or frame iterators, without writing temporary files.
+#
+# Example:
+#   import batchcorr
+#   dark = batchcorr.load_dark('dark_00001.ge2')
+#   bad = batchcorr.BadPixelMap.from_file('GE2Bad.img')
+#   total, nFrames = batchcorr.accumulate(batchcorr.iter_frames('scan_00002.ge2'))
+#   corrected = bad.apply(batchcorr.dark_subtract(total, dark, nFrames))
+#
+# Importing the package does not import NumPy; the submodules (and NumPy with
+# them) are only loaded the first time one of the names below is used.
+
+from __future__ import absolute_import
+
+import importlib
+import sys
+
+# Public name -> submodule that defines it
+_exports = {
+    'HEADER_BYTES': 'geio',
+    'NUM_X': 'geio',
+    'NUM_Y': 'geio',
+    'frame_count': 'geio',
+    'iter_frames': 'geio',
+    'read_bad_pixels': 'geio',
+    'write_frame': 'geio',
+    'BadPixelMap': 'correct',
+    'accumulate': 'correct',
+    'average': 'correct',
+    'load_dark': 'correct',
+    'dark_subtract': 'correct',
+    'background_subtract': 'correct',
+    'correct_frames': 'correct',
+    'rebin_frames': 'correct',
+}
+
+__all__ = sorted(_exports)
+
+
+def __getattr__(name):
+    try:
+        module = importlib.import_module('.' + _exports[name], __name__)
+    except KeyError:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+# Module-level __getattr__ is only honoured from Python 3.7 onwards;
+# older interpreters get everything imported up front instead.
+if sys.version_info < (3, 7):
+    for _name in __all__:
+        __getattr__(_name)
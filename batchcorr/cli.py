@@ -0,0 +1,92 @@
+# batchcorr.cli
+# Command-line plumbing shared by the batchcorrNP*.py scripts: argument parsing,
+# file discovery and the interactive prompts.
+# Nothing here runs at import time; the scripts call these from their main().
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import re
+import sys
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Typically 'C:\DetectorData\1339.6\Full\1339.6Full_BadPixel_d.txt.img'
+# Either a relative or an absolute path can be used.    It's probably safer to use an absolute path.
+DEFAULT_BAD_PIXEL_DIR = '/home/chris/Python/batchCorr/'
+
+
+def make_parser(description='Dark correction and summing of GE2 files.', badPixFile=None):
+    """Command-line parser arguments - make everything more user friendly."""
+    parser = argparse.ArgumentParser(
+        description=description,
+        epilog='Written by Chris Cochrane, Dec. 2012. E-mail: cochranec@gmail.com')
+    parser.add_argument('--lo', type=int, default=0, help='Lower bound of run numbers. NOT YET IMPLEMENTED')
+    parser.add_argument('--hi', type=int, default=1, help='Upper bound of run numbers. NOT YET IMPLEMENTED')
+    parser.add_argument('--all', '-a', action='store_true', default=True, help='Flag to perform dark correction on all GE2 files in present directory.')
+    parser.add_argument('--ndel', action='store_true', default=False, help='Print out .cor files.    Will produce a dark corrected output file for each frame in each GE2 file, as well as the sum files.    (WARNING: May use a LOT of space.)')
+    parser.add_argument('--drk', type=str, default='dark', help='Dark stub.    Some string that is unique to dark files.    Need not be the ENTIRE stub.    Default = "dark"')
+    if badPixFile is not None:
+        parser.add_argument('--bad', type=str, default=badPixFile, help='Path to bad pixel information.    Default = "%s"' % badPixFile)
+    return parser
+
+
+def is_dark(path, clargs):
+    # The 'dark' stub can be anywhere in the filename (not necessarily at the start)
+    return clargs.drk.lower() in path.lower()
+
+
+def run_number(path):
+    return int(re.findall(r'_([0-9]*)\.ge[1-4]', path)[0])
+
+
+def select_files(allfiles, clargs):
+    """Produce list of files to be corrected (everything that is not a dark file)."""
+    if not clargs.all:
+        return [x for x in allfiles if clargs.lo <= run_number(x) <= clargs.hi and not is_dark(x, clargs)]
+    return [x for x in allfiles if not is_dark(x, clargs)]
+
+
+def choose_dark(allfiles, clargs):
+    """Find dark files and ask which one should be used."""
+    darks = [x for x in allfiles if is_dark(x, clargs)]
+
+    print(len(darks), "candidate(s) for dark file found.")
+    if len(darks) == 0:
+        print("Double-check that dark file is properly located.")
+        sys.exit()
+    for i in range(len(darks)):
+        print("     (" + str(i+1) + ") " + darks[i])
+    print("Which dark file should we use?")
+    dkI = 0
+    while dkI < 1 or dkI > len(darks):
+        try:
+            dkI = int(input().strip())
+        except ValueError:
+            dkI = 0
+            print('Choose one of the available options. [1-' + str(len(darks)) + ']')
+    darkfile = darks[dkI-1]
+    print("Using", darkfile)
+    return darkfile
+
+
+def load_bad_pixels(badPixFile):
+    """Read in bad pixel data, exiting with a message if it cannot be found."""
+    from .correct import BadPixelMap
+    try:
+        return BadPixelMap.from_file(badPixFile)
+    except IOError:
+        print('\nUnable to access bad pixel information at ' + badPixFile)
+        print('Ensure that the file exists, or pass its location with --bad.\n')
+        sys.exit()
+
+
+def confirm(prompt, declined):
+    """Ask a ([y]/n) question, exiting with the declined message on 'n'."""
+    c = input(prompt + ' ([y]/n)').strip()
+    if c.lower() == 'n':
+        print(declined)
+        sys.exit()
@@ -0,0 +1,151 @@
+# batchcorr.correct
+# Summing, dark subtraction, bad pixel correction and background subtraction of
+# detector frames held in memory.
+# Frames are flat float32 arrays of length num_X * num_Y (as produced by
+# batchcorr.geio.iter_frames), but any C-contiguous float array of that size works,
+# including 2D (num_Y, num_X) arrays.
+# Functions that take a single frame modify it in place and also return it, so
+# a pipeline can avoid allocating a new 16 MB array at every step.
+
+from __future__ import absolute_import, division
+
+import numpy
+
+from .geio import NUM_X, NUM_Y, iter_frames, read_bad_pixels
+
+
+def _flat(frame):
+    # In-place corrections index the frame with flat pixel indices
+    if not frame.flags.c_contiguous:
+        raise ValueError('Frame must be a C-contiguous array to be corrected in place.')
+    return frame.reshape(-1)
+
+
+def accumulate(frames, out=None, shape=(NUM_X * NUM_Y,)):
+    """Sum an iterable of frames.
+
+    Returns (sum, nFrames).  The sum is float32; if out is given it is zeroed and
+    used to hold the sum instead of allocating a new array.  If there are no
+    frames (e.g. a GE file holding only its header) the sum is all zeros, with
+    the shape of out or else shape.
+    """
+    total = out
+    if total is not None:
+        total[...] = 0
+    nFrames = 0
+    for frame in frames:
+        if total is None:
+            total = numpy.zeros(numpy.shape(frame), numpy.float32)
+        total += frame
+        nFrames += 1
+    if total is None:
+        total = numpy.zeros(shape, numpy.float32)
+    return total, nFrames
+
+
+def average(frames):
+    """Average an iterable of frames, e.g. all exposures in a dark file."""
+    total, nFrames = accumulate(frames)
+    if nFrames == 0:
+        raise ValueError('Cannot average an empty sequence of frames.')
+    total /= nFrames
+    return total
+
+
+def load_dark(path, num_X=NUM_X, num_Y=NUM_Y):
+    """Read a dark file and average over all the exposures in it.
+
+    Averaging reduces the number of 'over reduced' pixels.
+    """
+    return average(iter_frames(path, num_X, num_Y))
+
+
+def dark_subtract(frame, dark, nFrames=1):
+    """Remove the dark from a frame (in place) that is the sum of nFrames exposures."""
+    if nFrames == 1:
+        frame -= dark
+    else:
+        frame -= dark * nFrames
+    return frame
+
+
+def background_subtract(frame, fraction=0.95):
+    """Simulate dark correction (in place) by removing a fraction of the median value.
+
+    Used when no dark file is available.
+    """
+    frame -= numpy.median(frame) * fraction
+    return frame
+
+
+class BadPixelMap(object):
+    """Bad pixel information for one detector.
+
+    Pixel data is stored as 0, 1, 2, 3.  Pixels flagged 2 are replaced by the
+    average of their nearest neighbours; pixels with an odd flag (the border
+    region) are set to 0.
+    """
+
+    def __init__(self, badPixels, num_X=NUM_X):
+        badPixels = numpy.asarray(badPixels).reshape(-1)
+        self.num_X = num_X
+        self.interpolated = numpy.flatnonzero(badPixels == 2)
+        self.zeroed = numpy.flatnonzero(badPixels % 2 == 1)
+
+    @classmethod
+    def from_file(cls, path, num_X=NUM_X, num_Y=NUM_Y):
+        """Load a bad pixel map from a bad pixel .img file."""
+        return cls(read_bad_pixels(path, num_X, num_Y), num_X)
+
+    def apply(self, frame, clip=True):
+        """Correct bad pixels in a frame, in place.
+
+        If clip is True, negative pixels are also set to 0.
+        """
+        flat = _flat(frame)
+        badInd = self.interpolated
+        num_X = self.num_X
+
+        # Correct for bad pixels by taking an average of nearest neighbours
+        flat[badInd] = (flat[badInd + 1] + flat[badInd - 1] + flat[badInd + num_X] + flat[badInd - num_X]) / 4
+
+        # Set border region and negative pixels to 0
+        flat[self.zeroed] = 0
+        if clip:
+            numpy.maximum(flat, 0, out=flat)
+        return frame
+
+
+def correct_frames(frames, dark=None, badPixels=None):
+    """Yield a dark and bad pixel corrected copy of each frame.
+
+    dark is an averaged dark frame (or None to skip dark subtraction) and
+    badPixels a BadPixelMap (or None to skip bad pixel correction).
+    """
+    for frame in frames:
+        corrected = numpy.array(frame, numpy.float32)
+        if dark is not None:
+            dark_subtract(corrected, dark)
+        if badPixels is not None:
+            badPixels.apply(corrected)
+        yield corrected
+
+
+def rebin_frames(frames, binSize):
+    """Yield the sum of each consecutive group of binSize frames.
+
+    Trailing frames that do not fill a complete group are dropped.
+    """
+    if binSize < 1:
+        raise ValueError('binSize must be at least 1, got %r.' % (binSize,))
+    total = None
+    nFrames = 0
+    for frame in frames:
+        if total is None:
+            total = numpy.zeros(numpy.shape(frame), numpy.float32)
+        total += frame
+        nFrames += 1
+        if nFrames == binSize:
+            yield total
+            total = None
+            nFrames = 0
@@ -0,0 +1,46 @@
+# batchcorr.geio
+# Reading and writing of GE detector files (*.ge1 - *.ge4, bad pixel *.img, *.sum, *.cor).
+# A GE file is an 8192 byte header followed by num_X * num_Y uint16 pixels per frame.
+# Frames are returned as flat float32 arrays of length num_X * num_Y, which is the
+# layout the correction functions in batchcorr.correct expect.
+
+from __future__ import absolute_import, division
+
+import os
+
+import numpy
+
+HEADER_BYTES = 8192
+NUM_X = 2048
+NUM_Y = 2048
+
+
+def frame_count(path, num_X=NUM_X, num_Y=NUM_Y):
+    """Number of complete frames stored in the GE file at path."""
+    statinfo = os.stat(path)
+    return (statinfo.st_size - HEADER_BYTES) // (2 * num_X * num_Y)
+
+
+def iter_frames(path, num_X=NUM_X, num_Y=NUM_Y):
+    """Yield each frame of the GE file at path as a flat float32 array.
+
+    Frames are read one at a time, so only a single frame is held in memory.
+    """
+    nFrames = frame_count(path, num_X, num_Y)
+    with open(path, mode='rb') as fileobj:
+        fileobj.seek(HEADER_BYTES)
+        for _ in range(nFrames):
+            yield numpy.fromfile(fileobj, numpy.uint16, num_X * num_Y).astype(numpy.float32)
+
+
+def read_bad_pixels(path, num_X=NUM_X, num_Y=NUM_Y):
+    """Read the raw bad pixel flags (0, 1, 2, 3) from a bad pixel .img file."""
+    with open(path, mode='rb') as badPxobj:
+        badPxobj.seek(HEADER_BYTES)
+        return numpy.fromfile(badPxobj, numpy.uint16, num_X * num_Y)
+
+
+def write_frame(frame, path):
+    """Write a frame to path as raw float32 values (the .sum / .cor format)."""
+    with open(path, mode='wb') as outFile:
+        numpy.asarray(frame, numpy.float32).tofile(outFile)
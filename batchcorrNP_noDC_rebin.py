@@ -10,125 +10,61 @@
 # corrections would take up to 100 times longer using the native Python functions.
 # NumPy can be downloaded from: http://www.numpy.org/
 # Written using NumPy version 1.5.1, on Python 2.7.1+
-# Not tested on Python 3.x; send any feedback to cochranec@gmail.com
+# The corrections themselves live in the batchcorr package; this script is only the
+# command-line front end.    Use the package directly to correct frames in memory.
+
+from __future__ import print_function
 
-import numpy
-import os
-import re
 import glob
-import sys
-import argparse
-
-# USER MUST DEFINE PATH TO BAD PIXEL INFORMATION
-# Typically 'C:\DetectorData\1339.6\Full\1339.6Full_BadPixel_d.txt.img'
-# Hard-coding this location in is inadvisable, as it makes the code less portable.
-# Either a relative or an absolute path can be used.    It's probably safer to use an absolute path.
-# (NB: the r prior to the string indicates a raw string, and must be included)
-badPixFile = '/home/chris/Python/batchCorr/GE3Bad.img'
-
-# Command-line parser arguments - make everything more user friendly
-parser = argparse.ArgumentParser(
-    description='Dark correction and summing of GE2 files.',
-    epilog='Written by Chris Cochrane, Dec. 2012. E-mail: cochranec@gmail.com')
-parser.add_argument('--lo', type=int, nargs=1, default=0,help='Lower bound of run numbers. NOT YET IMPLEMENTED')
-parser.add_argument('--hi', type=int, nargs=1, default=1,help='Upper bound of run numbers. NOT YET IMPLEMENTED')
-parser.add_argument('--all','-a', action='store_true', default=True,help='Flag to perform dark correction on all GE2 files in present directory.')
-parser.add_argument('--ndel', action='store_true', default=False, help='Print out .cor files.    Will produce a dark corrected output file for each frame in each GE2 file, as well as the sum files.    (WARNING: May use a LOT of space.)')
-parser.add_argument('--drk', type=str, nargs=1, default='dark', help='Dark stub.    Some string that is unique to dark files.    Need not be the ENTIRE stub.    Default = "dark"')
-clargs = parser.parse_args()
-
-num_X = 2048
-num_Y = 2048
-
-lo = clargs.lo
-hi = clargs.hi
-
-allfiles = glob.glob('*[0-9].ge*')
-
-#Recast the file reading function, which reduces runtime
-fread = numpy.fromfile
-
-#Preallocate memory space for arrays
-sumvalues = numpy.zeros(num_X*num_Y,numpy.float32)
-binvalues = numpy.zeros(num_X*num_Y,numpy.float32)
-corrected = numpy.array(num_X*num_Y,numpy.float32)
-darkvalues= numpy.array(num_X*num_Y,numpy.float32)
-badPixels = numpy.array(num_X*num_Y,numpy.float32)
-
-#Read in bad pixel data
-try:
-    with open(badPixFile, mode='rb') as badPxobj:
-                badPxobj.seek(8192)
-                badPixels = fread(badPxobj, numpy.uint16, num_X * num_Y)
-except IOError as e:
-    print '\nUnable to access bad pixel information at ' + badPixFile
-    print 'Ensure that the file exists, or change the "badPixFile" variable on line 26 to direct to the file location.\n'
-    sys.exit()
-
-# Find dark files.
-# The 'dark' stub can be anywhere in the filename (not necessarily at the start)
-
-sumvalues[:] = 0
-
-# Pixel data is stored as 0, 1, 2, 3
-# Any pixel with a non-zero value is deemed 'bad'
-badInd = numpy.array(numpy.where(badPixels == 2))
-badInd1= numpy.array(numpy.where(badPixels%2== 1))
-
-print "Bad pixel data read successfully."
-#print "High val is",hi,"; low val is",lo
-
-# Produce list of files to be dark corrected
-if not clargs.all:
-    print [int(re.findall('_([0-9]*).ge2',x)[0]) for x in allfiles]
-    files = [x for x in allfiles if lo <= int(re.findall('_([0-9]*).ge2',x)[0]) <= hi and clargs.drk.lower() not in x.lower()]
-else:
-    files = [x for x in allfiles if clargs.drk.lower() not in x.lower()]
-
-print len(files), "of", len(allfiles), "GE2 files in directory are in range. ", len([x for x in allfiles if clargs.drk.lower() in x.lower()]), "dark files ignored."
-
-# Maybe use a try: construct here
-c = raw_input('Perform summing (without dark correction!) on all available files? ([y]/n)').strip()
-if c.lower() == 'n':
-    print "No summing will be performed.    Terminating script."
-    sys.exit()
-else:
-    print "Proceeding with summing of files."
-
-#Perform a loop over all files
+import itertools
+
+from batchcorr import cli
+
+# Path to bad pixel information; override with --bad.
+badPixFile = cli.DEFAULT_BAD_PIXEL_DIR + 'GE3Bad.img'
+
 subBins = 5
-for f in files[:]:
-    statinfo = os.stat(f)
-    nFrames = (statinfo.st_size - 8192) / (2 * num_X * num_Y)
-    print "\nReading:",f, "\nFile contains", nFrames,"frames.    Summing (NOT dark correcting)."
 
-    # Sum all values in this file
-    with open(f, mode='rb') as fileobj:
-        fileobj.seek(8192)
-        nBins = nFrames / subBins
-        for j in range(subBins):
-            sumvalues[:] = 0
-            for i in range(nBins):
-                binvalues = fread(fileobj, numpy.uint16,num_X * num_Y).astype('float32')
-                sumvalues += binvalues
 
+def main():
+    clargs = cli.make_parser(badPixFile=badPixFile).parse_args()
+
+    import numpy
+    import batchcorr
+
+    allfiles = glob.glob('*[0-9].ge*')
+
+    badPixels = cli.load_bad_pixels(clargs.bad)
+    print("Bad pixel data read successfully.")
+
+    files = cli.select_files(allfiles, clargs)
+    print(len(files), "of", len(allfiles), "GE2 files in directory are in range. ", len([x for x in allfiles if cli.is_dark(x, clargs)]), "dark files ignored.")
+
+    cli.confirm('Perform summing (without dark correction!) on all available files?',
+                "No summing will be performed.    Terminating script.")
+    print("Proceeding with summing of files.")
 
-            # Remove the equivalent dark frame value
-            # Simulate dark correction by removing 95% of median value
-            corrected = sumvalues
-            corrected-=numpy.median(corrected) * 0.95
+    for f in files:
+        nFrames = batchcorr.frame_count(f)
+        print("\nReading:", f, "\nFile contains", nFrames, "frames.    Summing (NOT dark correcting).")
 
-            # Correct for bad pixels by taking an average of nearest neighbours
-            corrected[badInd] = (corrected[badInd + 1] + corrected[badInd - 1] + corrected[badInd + num_X] + corrected[badInd - num_X]) / 4
+        nBins = nFrames // subBins
+        if nBins == 0:
+            # Too few frames to fill a bin: every bin sum is empty
+            bins = (batchcorr.accumulate([])[0] for _ in range(subBins))
+        else:
+            bins = batchcorr.rebin_frames(batchcorr.iter_frames(f), nBins)
+        for j, corrected in enumerate(itertools.islice(bins, subBins)):
+            # Simulate dark correction by removing 95% of median value,
+            # then correct for bad pixels
+            badPixels.apply(batchcorr.background_subtract(corrected))
 
-            # Set border region and negative pixels to 0
-            corrected[badInd1] = 0
-            corrected[numpy.where(corrected<0)] = 0
+            sumName = f[:-4] + '_NDC_RB_' + str(j) + '.sum'
+            print("Output sum to " + sumName, numpy.median(corrected))
+            batchcorr.write_frame(corrected, sumName)
 
-            sumName = f[:-4] + '_NDC_RB_'+str(j) + '.sum'
-            print "Output sum to " + sumName, numpy.median(corrected)
-            with open(sumName, mode='wb') as outFile:
-                corrected.tofile(outFile)
+    print("Done")
 
-print("Done")
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the batchcorr package and the batchcorrNP*.py scripts importable from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,132 @@
+import os
+import subprocess
+import sys
+import threading
+
+import numpy
+import pytest
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+import batchcorr
+
+num_X = 16
+num_Y = 12
+
+
+def _frames(nFrames, seed=0):
+    rng = numpy.random.RandomState(seed)
+    return [rng.randint(0, 4000, num_X * num_Y).astype('float32') for _ in range(nFrames)]
+
+
+def _bad_pixels():
+    badPixels = numpy.zeros(num_X * num_Y, numpy.uint16)
+    badPixels[:num_X] = 1                       # border
+    badPixels[-num_X:] = 3                      # border
+    badPixels[[3 * num_X + 5, 7 * num_X + 9]] = 2   # interpolated
+    return badPixels
+
+
+def _write_ge(path, frames):
+    with open(path, mode='wb') as outFile:
+        outFile.write(b'\0' * batchcorr.HEADER_BYTES)
+        for frame in frames:
+            frame.astype(numpy.uint16).tofile(outFile)
+
+
+def test_matches_baseline_arithmetic():
+    frames = _frames(5)
+    dark = batchcorr.average(_frames(3, seed=1))
+    badPixels = _bad_pixels()
+
+    # Port of the original batchcorrNP2.py loop
+    sumvalues = numpy.zeros(num_X * num_Y, numpy.float32)
+    for binvalues in frames:
+        sumvalues = sumvalues + binvalues
+    expected = sumvalues - dark * len(frames)
+    badInd = numpy.array(numpy.where(badPixels == 2))
+    badInd1 = numpy.array(numpy.where(badPixels % 2 == 1))
+    expected[badInd] = (expected[badInd + 1] + expected[badInd - 1] + expected[badInd + num_X] + expected[badInd - num_X]) / 4
+    expected[badInd1] = 0
+    expected[numpy.where(expected < 0)] = 0
+
+    total, nFrames = batchcorr.accumulate(frames)
+    corrected = batchcorr.BadPixelMap(badPixels, num_X).apply(batchcorr.dark_subtract(total, dark, nFrames))
+
+    assert nFrames == 5
+    assert corrected.dtype == numpy.float32
+    numpy.testing.assert_array_equal(corrected, expected)
+
+
+def test_bad_pixels_2d_matches_flat():
+    frame = _frames(1)[0]
+    badPixels = batchcorr.BadPixelMap(_bad_pixels(), num_X)
+
+    flat = badPixels.apply(frame.copy())
+    square = badPixels.apply(frame.reshape(num_Y, num_X).copy())
+
+    assert square.shape == (num_Y, num_X)
+    numpy.testing.assert_array_equal(square.reshape(-1), flat)
+
+
+def test_bad_pixels_rejects_non_contiguous_frame():
+    frame = _frames(1)[0].reshape(num_Y, num_X).T
+    with pytest.raises(ValueError):
+        batchcorr.BadPixelMap(_bad_pixels(), num_X).apply(frame)
+
+
+def test_rebin_frames_drops_trailing_frames():
+    frames = _frames(7)
+    bins = list(batchcorr.rebin_frames(frames, 3))
+
+    assert len(bins) == 2
+    numpy.testing.assert_array_equal(bins[0], frames[0] + frames[1] + frames[2])
+    numpy.testing.assert_array_equal(bins[1], frames[3] + frames[4] + frames[5])
+
+
+def test_empty_file_sums_to_zeros(tmp_path):
+    path = str(tmp_path / 'scan_00001.ge2')
+    _write_ge(path, [])
+
+    total, nFrames = batchcorr.accumulate(batchcorr.iter_frames(path))
+
+    assert nFrames == 0
+    assert total.shape == (batchcorr.NUM_X * batchcorr.NUM_Y,)
+    assert not total.any()
+    dark = numpy.ones(batchcorr.NUM_X * batchcorr.NUM_Y, numpy.float32)
+    assert not batchcorr.dark_subtract(total, dark, nFrames).any()
+
+
+def test_accumulate_empty_uses_out():
+    out = numpy.ones((num_Y, num_X), numpy.float32)
+    total, nFrames = batchcorr.accumulate([], out=out)
+
+    assert total is out
+    assert nFrames == 0
+    assert not out.any()
+
+
+def test_parallel_worker_survives_bad_file(tmp_path):
+    import batchcorrNP_Parallel_GlobDir as script
+
+    q = Queue()
+    q.put(str(tmp_path / 'missing_00001.ge1'))
+    q.put(str(tmp_path / 'missing_00002.ge1'))
+    worker = threading.Thread(target=script.correctFile, args=(q, None, None, 1, 0))
+    worker.daemon = True
+    worker.start()
+
+    # task_done() must still be called for every file, so q.join() returns
+    for _ in range(100):
+        if q.unfinished_tasks == 0:
+            break
+        worker.join(0.05)
+    assert q.unfinished_tasks == 0
+
+
+def test_import_does_not_load_numpy():
+    code = 'import sys, batchcorr, batchcorr.cli; sys.exit("numpy" in sys.modules)'
+    assert subprocess.call([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) == 0